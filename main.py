@@ -1,20 +1,309 @@
 import os
 import io
 import logging
-import hashlib
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from pyarrow import csv as pacsv
 from google.cloud import bigquery
 from google.cloud import storage
+from google.cloud.storage import transfer_manager
 from google.cloud.exceptions import NotFound
-from decimal import Decimal, InvalidOperation
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Above this size, download with parallel range-GETs instead of a single stream.
+PARALLEL_DOWNLOAD_THRESHOLD = 32 * 1024 * 1024
+
+# Clients are cached per process: Cloud Functions reuses instances across
+# invocations, so auth discovery and TLS setup are paid once per instance
+# instead of once per event. Both clients are documented thread-safe.
+_storage_client = None
+_bq_client = None
+
+# Target tables already confirmed to exist, so warm invocations skip the
+# get_table round-trip. Nothing in this function ever drops the target,
+# so the cache cannot go stale within an instance's lifetime.
+_known_tables = set()
+
+
+def _get_storage_client():
+    global _storage_client
+    if _storage_client is None:
+        _storage_client = storage.Client()
+    return _storage_client
+
+
+def _get_bq_client(project_id):
+    global _bq_client
+    if _bq_client is None:
+        _bq_client = bigquery.Client(project=project_id)
+    return _bq_client
+
+# Mapping known columns to English for better SQL handling
+# This ensures specific columns are renamed, while keeping all other columns intact
+COLUMN_MAP = {
+    '日付': 'event_date',
+    '入金予定日': 'payout_scheduled_date',
+    '種別': 'type',
+    '確認コード': 'confirmation_code',
+    '予約日': 'booking_date',
+    '開始日': 'start_date',
+    '終了日': 'end_date',
+    '泊数': 'number_of_nights',
+    'ゲスト': 'guest',
+    'リスティング': 'listing_name',
+    '詳細': 'details',
+    '参照コード': 'reference_code',
+    '通貨': 'currency',
+    '金額': 'amount',
+    '支払い済み': 'paid',
+    'サービス料': 'service_fee',
+    'スピード送金の手数料': 'express_transfer_fee',
+    '清掃料金': 'cleaning_fee',
+    'ペット料金': 'pet_fee',
+    '総収入': 'total_income',
+    '宿泊税': 'accommodation_tax',
+    'ホスティング収入年度': 'hosting_revenue_fiscal_year'
+}
+
+# Explicitly format date columns to ensure BQ recognizes them correctly
+DATE_COLS = ['event_date', 'payout_scheduled_date', 'booking_date', 'start_date', 'end_date']
+
+# Sanitize data types for BigQuery
+NUMERIC_COLS = [
+    'amount', 'paid', 'service_fee', 'express_transfer_fee', 'cleaning_fee',
+    'pet_fee', 'total_income', 'accommodation_tax'
+]
+INTEGER_COLS = ['number_of_nights', 'hosting_revenue_fiscal_year']
+
+# Parse financial columns as decimal128 and counts as int64 directly in the
+# CSV reader (keyed by the original Japanese headers): values go straight
+# from text to decimal in one pass, with no float64 round-trip that could
+# reintroduce the precision loss the NUMERIC schema exists to prevent.
+# Date columns are pinned to string so the reader never type-infers them
+# (ISO-formatted exports would otherwise come back as date32) and the
+# strptime pass in _clean_chunk sees consistent input.
+CSV_COLUMN_TYPES = {
+    jp: (
+        pa.decimal128(38, 9) if en in NUMERIC_COLS
+        else pa.int64() if en in INTEGER_COLS
+        else pa.string()
+    )
+    for jp, en in COLUMN_MAP.items()
+    if en in NUMERIC_COLS or en in INTEGER_COLS or en in DATE_COLS
+}
+
+# Explicit schema to ensure financial columns use NUMERIC type instead of
+# FLOAT64 to prevent rounding errors. Built once per process.
+JOB_SCHEMA = [
+    bigquery.SchemaField("event_date", "DATE"),
+    bigquery.SchemaField("payout_scheduled_date", "DATE"),
+    bigquery.SchemaField("type", "STRING"),
+    bigquery.SchemaField("confirmation_code", "STRING"),
+    bigquery.SchemaField("booking_date", "DATE"),
+    bigquery.SchemaField("start_date", "DATE"),
+    bigquery.SchemaField("end_date", "DATE"),
+    bigquery.SchemaField("number_of_nights", "INTEGER"),
+    bigquery.SchemaField("guest", "STRING"),
+    bigquery.SchemaField("listing_name", "STRING"),
+    bigquery.SchemaField("details", "STRING"),
+    bigquery.SchemaField("reference_code", "STRING"),
+    bigquery.SchemaField("currency", "STRING"),
+    bigquery.SchemaField("amount", "NUMERIC"),
+    bigquery.SchemaField("paid", "NUMERIC"),
+    bigquery.SchemaField("service_fee", "NUMERIC"),
+    bigquery.SchemaField("express_transfer_fee", "NUMERIC"),
+    bigquery.SchemaField("cleaning_fee", "NUMERIC"),
+    bigquery.SchemaField("pet_fee", "NUMERIC"),
+    bigquery.SchemaField("total_income", "NUMERIC"),
+    bigquery.SchemaField("accommodation_tax", "NUMERIC"),
+    bigquery.SchemaField("hosting_revenue_fiscal_year", "INTEGER"),
+]
+
+
+def _open_arrow_csv(csv_stream):
+    """Open an Airbnb earnings CSV stream as an incremental Arrow reader."""
+    return pacsv.open_csv(
+        csv_stream,
+        read_options=pacsv.ReadOptions(encoding='utf-8-sig', block_size=8 << 20),
+        convert_options=pacsv.ConvertOptions(
+            strings_can_be_null=True,
+            column_types=CSV_COLUMN_TYPES,
+        ),
+    )
+
+
+# BigQuery field types -> Arrow types for the Parquet staging load.
+# NUMERIC maps to decimal128(38, 9), preserving financial precision.
+BQ_TO_ARROW_TYPES = {
+    "NUMERIC": pa.decimal128(38, 9),
+    "BIGNUMERIC": pa.decimal128(38, 9),
+    "DATE": pa.date32(),
+    "INTEGER": pa.int64(),
+    "INT64": pa.int64(),
+    "FLOAT": pa.float64(),
+    "FLOAT64": pa.float64(),
+    "BYTES": pa.binary(),
+    "BOOLEAN": pa.bool_(),
+    "TIMESTAMP": pa.timestamp('us', tz='UTC'),
+}
+
+
+def _arrow_type(field):
+    """Map a BigQuery SchemaField to the Arrow type used for the Parquet load."""
+    return BQ_TO_ARROW_TYPES.get(field.field_type, pa.string())
+
+
+def _build_arrow_schema(df, job_schema):
+    """
+    Mirror the BigQuery job schema as an Arrow schema, keeping any extra
+    (unmapped) DataFrame columns with their inferred types so they still
+    reach the staging table.
+    """
+    known = {field.name for field in job_schema}
+    fields = [pa.field(field.name, _arrow_type(field)) for field in job_schema]
+    extra_cols = [col for col in df.columns if col not in known]
+    if extra_cols:
+        inferred = pa.Schema.from_pandas(df[extra_cols], preserve_index=False)
+        fields.extend(inferred.field(col) for col in extra_cols)
+    return pa.schema(fields)
+
+
+def _clean_chunk(df, job_schema, log_diagnostics=True):
+    """
+    Cleanse one chunk of the earnings CSV: rename columns, normalize dates
+    and numerics, and align to the BigQuery schema.
+
+    log_diagnostics silences the per-chunk warnings after the first chunk,
+    since every chunk of one CSV has the same columns.
+    """
+    # Strip header whitespace and apply COLUMN_MAP in one pass by assigning a
+    # rebuilt Index directly — no block copy, no rename hash-map walk.
+    stripped = [col.strip() for col in df.columns]
+
+    # Identify columns in the CSV that are not in our COLUMN_MAP (unexpected/unknown columns)
+    # These columns keep their original names
+    unmapped_source_columns = [col for col in stripped if col not in COLUMN_MAP]
+    if unmapped_source_columns and log_diagnostics:
+        logger.warning(f"Found unmapped columns in the input CSV: {unmapped_source_columns}. "
+                       f"These columns will be loaded with their original names into the staging table. "
+                       f"Consider updating COLUMN_MAP or the target BigQuery table schema if these columns are important.")
+
+    df.columns = [COLUMN_MAP.get(col, col) for col in stripped]
+
+    # Membership checks against a pandas Index are O(n_cols) each; build a
+    # set once and reuse it for all the column probes below.
+    present = set(df.columns)
+
+    for col in DATE_COLS:
+        if col in present:
+            values = pa.array(df[col], from_pandas=True)
+            if pa.types.is_temporal(values.type):
+                # Already parsed (e.g. a whitespace-stripped header that
+                # missed CSV_COLUMN_TYPES and got type-inferred by the
+                # reader): just narrow to date32.
+                dates = pc.cast(values, pa.date32())
+            else:
+                # Airbnb typically uses MM/DD/YYYY format, but some exports
+                # arrive ISO-formatted. Arrow's strptime parses the whole
+                # column in one C++ pass per format (error_is_null matches
+                # the old errors='coerce') instead of materializing a
+                # datetime64 series per column via pd.to_datetime.
+                strings = pc.cast(values, pa.string())
+                parsed = pc.coalesce(
+                    pc.strptime(strings, format='%m/%d/%Y', unit='s', error_is_null=True),
+                    pc.strptime(strings, format='%Y-%m-%d', unit='s', error_is_null=True),
+                )
+                dates = pc.cast(parsed, pa.date32())
+            # Keep the column Arrow-backed (4 bytes/value) instead of
+            # boxing every value into a Python datetime.date object;
+            # the Parquet writer then takes it zero-copy.
+            df[col] = pd.arrays.ArrowExtensionArray(dates)
+
+    # NUMERIC columns normally arrive from the CSV reader already typed as
+    # decimal128 (object dtype of Decimal). The cast below only runs for
+    # columns the reader could not type — e.g. a header that needed
+    # whitespace-stripping before it matched CSV_COLUMN_TYPES.
+    for col in NUMERIC_COLS:
+        if col in present and df[col].dtype != object:
+            values = pa.array(pd.to_numeric(df[col], errors='coerce'), from_pandas=True)
+            df[col] = pc.cast(values, pa.decimal128(38, 9)).to_pandas()
+
+    # Sanitize INTEGER columns
+    for col in INTEGER_COLS:
+        if col in present:
+            # Coerce to numeric, then to pandas' nullable integer type
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+            df[col] = df[col].astype('Int64')
+
+    # Align chunk columns with the schema before loading to prevent errors.
+    # This adds any missing columns as NULL.
+    for field in job_schema:
+        if field.name not in present:
+            if log_diagnostics:
+                logger.warning(
+                    f"Column '{field.name}' not in CSV; adding as NULL column to match schema."
+                )
+            if field.field_type in ("NUMERIC", "BIGNUMERIC"):
+                # Add as object dtype to hold None, consistent with Decimal columns
+                df[field.name] = None
+                df[field.name] = df[field.name].astype(object)
+            elif field.field_type == "INTEGER":
+                df[field.name] = pd.NA  # Use pandas NA for nullable Int64
+                df[field.name] = df[field.name].astype('Int64')
+            else:
+                df[field.name] = None
+
+    return df
+
+
+def _stage_csv_to_parquet(csv_stream, parquet_buf, job_schema):
+    """
+    Parse and cleanse the CSV in bounded-memory chunks, appending each
+    cleaned chunk to a single Parquet buffer. Parsing and Parquet encoding
+    are pipelined per chunk, so peak memory is O(chunk) instead of several
+    copies of the whole file.
+
+    Returns (total_rows, staging_schema); staging_schema is None for a
+    header-only file, in which case nothing is written to the buffer.
+    """
+    reader = _open_arrow_csv(csv_stream)
+    writer = None
+    staging_schema = None
+    total_rows = 0
+    try:
+        for batch in reader:
+            chunk = _clean_chunk(batch.to_pandas(), job_schema, log_diagnostics=writer is None)
+            if writer is None:
+                staging_schema = _build_arrow_schema(chunk, job_schema)
+                writer = pq.ParquetWriter(parquet_buf, staging_schema, compression='snappy')
+            writer.write_table(
+                pa.Table.from_pandas(chunk, schema=staging_schema, preserve_index=False)
+            )
+            total_rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return total_rows, staging_schema
+
+
+def _table_exists(bq_client, table_ref):
+    """Return True if the BigQuery table exists."""
+    try:
+        bq_client.get_table(table_ref)
+        return True
+    except NotFound:
+        return False
+
+
 def load_airbnb_csv(event, context=None):
     """
-    Cloud Function to load Airbnb earnings CSV from GCS to BigQuery with Upsert (MERGE) logic.
+    Cloud Function to load Airbnb earnings CSV from GCS to BigQuery with deduplicating insert logic.
     Supports both Gen 1 and Gen 2 (CloudEvent) signatures.
     """
 
@@ -42,203 +331,139 @@ def load_airbnb_csv(event, context=None):
     staging_table_id = f"{table_id}_staging"
 
     try:
-        # 3. Download CSV from Google Cloud Storage
-        storage_client = storage.Client()
+        # 3. Fetch CSV from Google Cloud Storage
+        # Small files are streamed straight into the parser, overlapping the
+        # GCS transfer with the parse. Large files are fetched with parallel
+        # range-GETs via the transfer manager, since a single HTTPS stream
+        # leaves most of the available GCS bandwidth unused.
+        storage_client = _get_storage_client()
         blob = storage_client.bucket(bucket_name).blob(file_name)
-        content = blob.download_as_bytes()
-
-        # 4. Data Cleansing with Pandas
-        # Use utf-8-sig to handle potential BOM in Airbnb CSV
-        df = pd.read_csv(io.BytesIO(content), encoding='utf-8-sig')
-        df.columns = df.columns.str.strip() # Remove any leading/trailing whitespace from headers
-
-        # Mapping known columns to English for better SQL handling
-        # This part ensures specific columns are renamed, while keeping all other columns intact
-        COLUMN_MAP = {
-            '日付': 'event_date',
-            '入金予定日': 'payout_scheduled_date',
-            '種別': 'type',
-            '確認コード': 'confirmation_code',
-            '予約日': 'booking_date',
-            '開始日': 'start_date',
-            '終了日': 'end_date',
-            '泊数': 'number_of_nights',
-            'ゲスト': 'guest',
-            'リスティング': 'listing_name',
-            '詳細': 'details',
-            '参照コード': 'reference_code',
-            '通貨': 'currency',
-            '金額': 'amount',
-            '支払い済み': 'paid',
-            'サービス料': 'service_fee',
-            'スピード送金の手数料': 'express_transfer_fee',
-            '清掃料金': 'cleaning_fee',
-            'ペット料金': 'pet_fee',
-            '総収入': 'total_income',
-            '宿泊税': 'accommodation_tax',
-            'ホスティング収入年度': 'hosting_revenue_fiscal_year'
-        }
-
-        # Identify columns in the CSV that are not in our COLUMN_MAP (unexpected/unknown columns)
-        # These columns will remain with their original names after df.rename()
-        source_columns = set(df.columns) # Columns in the raw CSV
-        mapped_source_columns = set(COLUMN_MAP.keys()) # Japanese names we expect to map
-
-        unmapped_source_columns = [col for col in source_columns if col not in mapped_source_columns]
-
-        if unmapped_source_columns:
-            logger.warning(f"Found unmapped columns in the input CSV: {unmapped_source_columns}. "
-                           f"These columns will be loaded with their original names into the staging table. "
-                           f"Consider updating COLUMN_MAP or the target BigQuery table schema if these columns are important.")
-
-        df.rename(columns=COLUMN_MAP, inplace=True)
-
-        # Explicitly format date columns to ensure BQ recognizes them correctly
-        date_cols = ['event_date', 'payout_scheduled_date', 'booking_date', 'start_date', 'end_date']
-        for col in date_cols:
-            if col in df.columns:
-                # Airbnb typically uses MM/DD/YYYY format
-                df[col] = pd.to_datetime(df[col], format='%m/%d/%Y', errors='coerce').dt.date
-
-        # Sanitize data types for BigQuery
-        numeric_cols = [
-            'amount', 'paid', 'service_fee', 'express_transfer_fee', 'cleaning_fee',
-            'pet_fee', 'total_income', 'accommodation_tax'
-        ]
-        integer_cols = ['number_of_nights', 'hosting_revenue_fiscal_year']
-
-        # Sanitize NUMERIC columns to Python's Decimal to preserve precision
-        for col in numeric_cols:
-            if col in df.columns:
-                # Convert to string first to avoid float precision issues, then to Decimal.
-                df[col] = pd.to_numeric(df[col], errors='coerce').astype(str)
-                def to_decimal(x):
-                    try:
-                        # Handle pandas' string representation of NaN
-                        if x in ('nan', '<NA>'):
-                            return None
-                        return Decimal(x)
-                    except (InvalidOperation, TypeError):
-                        return None # Corresponds to NULL in BigQuery
-                df[col] = df[col].apply(to_decimal)
-
-        # Sanitize INTEGER columns
-        for col in integer_cols:
-            if col in df.columns:
-                # Coerce to numeric, then to pandas' nullable integer type
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-                df[col] = df[col].astype('Int64')
-
-
-        # 5. IDEMPOTENCY: Generate a unique hash for each row to serve as a Primary Key (row_id)
-        # We use SHA256 on the entire row content to ensure even entries without IDs (like Payouts) are unique
-        df['row_id'] = df.apply(
-            lambda row: hashlib.sha256(str(tuple(row)).encode('utf-8')).hexdigest(), 
-            axis=1
-        )
+        blob_size = int(data.get('size') or 0)
 
-        # 6. BigQuery Operations (Staging -> Merge -> Cleanup)
-        bq_client = bigquery.Client(project=project_id)
+        # 4/5. Parse and cleanse in streaming chunks, serializing each
+        # cleaned chunk into one Snappy-compressed Parquet buffer.
+        parquet_buf = io.BytesIO()
+        if blob_size > PARALLEL_DOWNLOAD_THRESHOLD:
+            local_path = '/tmp/airbnb_earnings_download.csv'
+            blob.reload()  # transfer_manager needs size/generation metadata
+            # THREAD workers: the range-GETs are I/O-bound, and the default
+            # process pool needs /dev/shm, which the Gen 1 sandbox lacks.
+            # Threads also reuse the module-level Client instead of pickling
+            # one per subprocess.
+            transfer_manager.download_chunks_concurrently(
+                blob, local_path, chunk_size=32 * 1024 * 1024, max_workers=8,
+                worker_type=transfer_manager.THREAD,
+            )
+            try:
+                with open(local_path, 'rb') as csv_stream:
+                    total_rows, staging_schema = _stage_csv_to_parquet(csv_stream, parquet_buf, JOB_SCHEMA)
+            finally:
+                os.remove(local_path)
+        else:
+            # 8 MiB read chunks: far fewer HTTP round-trips than the 256 KiB
+            # default, without over-buffering files near the size threshold.
+            with blob.open('rb', chunk_size=8 * 1024 * 1024) as csv_stream:
+                total_rows, staging_schema = _stage_csv_to_parquet(csv_stream, parquet_buf, JOB_SCHEMA)
+        parquet_buf.seek(0)
+
+        # Header-only exports are common from automated pipelines: skip the
+        # load, upsert, and cleanup jobs entirely when there is nothing to
+        # load (~3 BigQuery round-trips saved).
+        if total_rows == 0:
+            logger.info(f"No data rows in {file_name}; skipping BigQuery load.")
+            return
+
+        # 6. BigQuery Operations (Staging -> Dedup Insert -> Cleanup)
+        bq_client = _get_bq_client(project_id)
         table_ref = f"{project_id}.{dataset_id}.{table_id}"
         staging_ref = f"{project_id}.{dataset_id}.{staging_table_id}"
 
-        # Define explicit schema to ensure financial columns use NUMERIC type
-        # instead of FLOAT64 to prevent rounding errors.
-        job_schema = [
-            bigquery.SchemaField("event_date", "DATE"),
-            bigquery.SchemaField("payout_scheduled_date", "DATE"),
-            bigquery.SchemaField("type", "STRING"),
-            bigquery.SchemaField("confirmation_code", "STRING"),
-            bigquery.SchemaField("booking_date", "DATE"),
-            bigquery.SchemaField("start_date", "DATE"),
-            bigquery.SchemaField("end_date", "DATE"),
-            bigquery.SchemaField("number_of_nights", "INTEGER"),
-            bigquery.SchemaField("guest", "STRING"),
-            bigquery.SchemaField("listing_name", "STRING"),
-            bigquery.SchemaField("details", "STRING"),
-            bigquery.SchemaField("reference_code", "STRING"),
-            bigquery.SchemaField("currency", "STRING"),
-            bigquery.SchemaField("amount", "NUMERIC"),
-            bigquery.SchemaField("paid", "NUMERIC"),
-            bigquery.SchemaField("service_fee", "NUMERIC"),
-            bigquery.SchemaField("express_transfer_fee", "NUMERIC"),
-            bigquery.SchemaField("cleaning_fee", "NUMERIC"),
-            bigquery.SchemaField("pet_fee", "NUMERIC"),
-            bigquery.SchemaField("total_income", "NUMERIC"),
-            bigquery.SchemaField("accommodation_tax", "NUMERIC"),
-            bigquery.SchemaField("hosting_revenue_fiscal_year", "INTEGER"),
-            bigquery.SchemaField("row_id", "STRING", "REQUIRED"),
-        ]
-
         # A. Load to Staging Table (Overwrite)
-        # Align DataFrame columns with the schema before loading to prevent errors.
-        # This adds any missing columns as NULL.
-        logger.info("Aligning DataFrame columns with explicit BigQuery schema...")
-        for field in job_schema:
-            if field.name not in df.columns:
-                logger.warning(
-                    f"Column '{field.name}' not in CSV; adding as NULL column to match schema."
-                )
-                if field.field_type in ("NUMERIC", "BIGNUMERIC"):
-                    # Add as object dtype to hold None, consistent with Decimal columns
-                    df[field.name] = None
-                    df[field.name] = df[field.name].astype(object)
-                elif field.field_type == "INTEGER":
-                    df[field.name] = pd.NA # Use pandas NA for nullable Int64
-                    df[field.name] = df[field.name].astype('Int64')
-                else:
-                    df[field.name] = None
-        
-        # Using autodetect=True allows the schema to adapt to "all columns" provided in the CSV
+        # No autodetect: the Parquet file is self-describing, so asking the
+        # server to sample the data for schema detection is wasted work. Extra
+        # CSV columns still arrive because they are part of the Parquet schema.
         load_job_config = bigquery.LoadJobConfig(
             write_disposition="WRITE_TRUNCATE",
-            schema=job_schema, # Use explicit schema
-            autodetect=True
+            source_format=bigquery.SourceFormat.PARQUET,
         )
 
-        load_job = bq_client.load_table_from_dataframe(df, staging_ref, job_config=load_job_config)
-        load_job.result() # Wait for the load to complete
-        logger.info(f"Loaded {len(df)} rows to staging table.")
-
-        # B. Check if target table exists
-        try:
-            bq_client.get_table(table_ref)
-            table_exists = True
-        except NotFound:
-            table_exists = False
+        # B. Run the staging load and the target-existence check concurrently:
+        # the existence answer is known by the time the load job finishes,
+        # saving a serial RPC round-trip per invocation. Once an invocation
+        # on this instance has confirmed the target, skip the probe entirely.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            load_future = executor.submit(
+                lambda: bq_client.load_table_from_file(
+                    parquet_buf, staging_ref, job_config=load_job_config
+                ).result()  # Wait for the load to complete
+            )
+            if table_ref in _known_tables:
+                exists_future = None
+            else:
+                exists_future = executor.submit(_table_exists, bq_client, table_ref)
+            load_future.result()
+            table_exists = exists_future is None or exists_future.result()
+        if table_exists:
+            _known_tables.add(table_ref)
+        logger.info(f"Loaded {total_rows} rows to staging table.")
 
         if not table_exists:
-            # First run: Copy staging table to target table
+            # First run: Create the target table from staging, partitioned by
+            # event_date and clustered on row_id so subsequent dedup inserts
+            # prune to affected partitions and probe only matching clusters
+            # instead of scanning the whole table. row_id is computed by
+            # BigQuery itself (see the INSERT below).
             logger.info(f"Target table {table_ref} not found. Creating it for the first time.")
-            copy_job_config = bigquery.CopyJobConfig(write_disposition="WRITE_TRUNCATE")
-            copy_job = bq_client.copy_table(staging_ref, table_ref, job_config=copy_job_config)
-            copy_job.result()
+            create_query = f"""
+            CREATE TABLE `{table_ref}`
+            PARTITION BY event_date
+            CLUSTER BY row_id
+            AS SELECT s.*, FARM_FINGERPRINT(TO_JSON_STRING(s)) AS row_id
+            FROM `{staging_ref}` s
+            """
+            bq_client.query(create_query).result()
+            _known_tables.add(table_ref)
             logger.info("Target table created successfully.")
         else:
-            # Subsequent runs: Perform MERGE (Upsert)
-            logger.info(f"Target table {table_ref} exists. Performing MERGE.")
-            columns_list = ", ".join([f"`{c}`" for c in df.columns])
-            source_columns_list = ", ".join([f"S.`{c}`" for c in df.columns])
-
-            merge_query = f"""
-            MERGE `{table_ref}` T
-            USING `{staging_ref}` S
-            ON T.row_id = S.row_id
-            WHEN NOT MATCHED THEN
-              INSERT ({columns_list}) VALUES ({source_columns_list})
+            # Subsequent runs: insert rows that are not in the target yet.
+            logger.info(f"Target table {table_ref} exists. Inserting new rows.")
+            staging_columns = list(staging_schema.names) + ['row_id']
+            columns_list = ", ".join([f"`{c}`" for c in staging_columns])
+
+            # IDEMPOTENCY: the dedup key is FARM_FINGERPRINT over the JSON
+            # serialization of the staging row, computed by BigQuery itself at
+            # warehouse speed. The old MERGE had no UPDATE clause, so a plain
+            # anti-join INSERT expresses the same semantics and lets BigQuery
+            # use a hash anti-join instead of MERGE's row-versioning
+            # machinery. Restricting the probe to the staging file's date
+            # range lets BigQuery prune target partitions instead of scanning
+            # the whole table; rows without an event_date (e.g. payout lines)
+            # are matched unconditionally so they still dedupe.
+            insert_query = f"""
+            INSERT INTO `{table_ref}` ({columns_list})
+            SELECT {columns_list}
+            FROM (
+              SELECT s.*, FARM_FINGERPRINT(TO_JSON_STRING(s)) AS row_id
+              FROM `{staging_ref}` s
+            ) S
+            WHERE NOT EXISTS (
+              SELECT 1 FROM `{table_ref}` T
+              WHERE T.row_id = S.row_id
+                AND (T.event_date IS NULL
+                     OR T.event_date BETWEEN (SELECT MIN(event_date) FROM `{staging_ref}`)
+                                         AND (SELECT MAX(event_date) FROM `{staging_ref}`))
+            )
             """
-            query_job = bq_client.query(merge_query)
-            query_job.result() # Wait for the merge to complete
+            query_job = bq_client.query(insert_query)
+            query_job.result() # Wait for the insert to complete
 
-            # Get merge statistics
-            if query_job.dml_stats:
-                rows_inserted = query_job.dml_stats.inserted_row_count if query_job.dml_stats.inserted_row_count is not None else 0
-                rows_updated = query_job.dml_stats.updated_row_count if query_job.dml_stats.updated_row_count is not None else 0
+            # Get insert statistics
+            if query_job.dml_stats and query_job.dml_stats.inserted_row_count is not None:
+                rows_inserted = query_job.dml_stats.inserted_row_count
             else:
                 rows_inserted = 0
-                rows_updated = 0
-            
-            logger.info(f"MERGE operation completed. Rows inserted: {rows_inserted}, Rows updated: {rows_updated}.")
+
+            logger.info(f"Upsert completed. Rows inserted: {rows_inserted}.")
 
         # C. Cleanup: Delete Staging Table
         bq_client.delete_table(staging_ref, not_found_ok=True)